@@ -126,7 +126,7 @@ import re
 import json
 from datetime import date, timedelta
 import html
-from functions.load_comments import load_stock_comment, load_index_comment, load_macro_note, load_eur_macro_comment,load_live_macro_block,render_live_macro_block,load_liv2_macro_block,load_liv3_macro_block,render_liv2_macro_block,load_live_week,load_live_sheet,load_live_sheet_n
+from functions.load_comments import load_stock_comment, load_index_comment, load_macro_note, load_eur_macro_comment,load_live_macro_block,render_live_macro_block,load_livn_macro_block,render_liv2_macro_block,load_live_week,load_live_sheet,load_live_sheet_n
 from functions.fred_tools import generate_labor_chart,generate_jobs_chart,generate_cpi_chart
 from functions.yahoo_tools import load_indices_ohlc, generate_ohlc
 
@@ -324,23 +324,17 @@ def repondre(question: str):
         comment_text = render_live_macro_block(comment_text)
         return comment_text, None  
 
-    if q_upper.startswith("LIV2"):
-        region, country = _parse_region_and_country(q, "LIV2")  # use original q (preserve case for country)
-        comment_text = load_liv2_macro_block(region)
+    # 🟣 LIV<N><REGION>[:Country] → N premiers blocs LIVE (LIV2USD, LIV3DM:Japan, LIV5EUR…)
+    livn = re.match(r"LIV([1-9]\d*)", q_upper)
+    if livn:
+        n = int(livn.group(1))
+        region, country = _parse_region_and_country(q, livn.group(0))  # use original q (preserve case for country)
+        comment_text = load_livn_macro_block(region, n)
         if country:
             comment_text = render_liv2_macro_block(comment_text, country)  # filter + render
         else:
             comment_text = render_live_macro_block(comment_text)           # render full
         return comment_text, None
-
-    if q_upper.startswith("LIV3"):
-        region, country = _parse_region_and_country(q, "LIV3")
-        comment_text = load_liv3_macro_block(region)
-        if country:
-            comment_text = render_liv2_macro_block(comment_text, country)  # name is fine: it filters 1 country
-        else:
-            comment_text = render_live_macro_block(comment_text)
-        return comment_text, None 
     
     # 🔎 Cherche un des tickers dans la question
     for code in listTickerEquity:
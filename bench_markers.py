@@ -0,0 +1,83 @@
+"""
+Benchmark for the marker scanner (functions/markers.py).
+
+Pathological input: a 10 MB file holding 500 <<EUR_WEEK_BEGIN>> tags and
+no END tag at all, i.e. what a misspelled END marker does to EUR_WEEK.txt.
+
+  * legacy  - re.findall(BEGIN(.*?)END, DOTALL), the pre-index loader code.
+              Rescans to end of file from every BEGIN (quadratic).
+  * scanner - MarkerScan, one linear pass; reports the first BEGIN as
+              "unclosed" and every repeat as "nested".
+
+The legacy regex takes tens of seconds on the full input, so by default it
+runs on a 1 MB / 50-tag slice; pass --full to time it on the whole file.
+
+Run:
+    python bench_markers.py [--full]
+"""
+from __future__ import annotations
+
+import re
+import sys
+import time
+
+from functions.markers import MarkerScan
+
+TOTAL_BYTES = 10 * 1024 * 1024
+N_BEGIN = 500
+STEM = "EUR_WEEK"
+
+
+def build_pathological(total_bytes: int, n_begin: int) -> str:
+    begin = f"<<{STEM}_BEGIN>>\n"
+    filler = "Germany - HICP (Mar) | **** actual 2.3% vs 2.2% poll\n"
+    per_block = max(total_bytes // n_begin - len(begin), 0)
+    body = (filler * (per_block // len(filler) + 1))[:per_block]
+    return "".join(begin + body for _ in range(n_begin))
+
+
+def time_legacy(text: str) -> tuple[float, int]:
+    pattern = re.compile(
+        re.escape(f"<<{STEM}_BEGIN>>") + r"(.*?)" + re.escape(f"<<{STEM}_END>>"),
+        re.S,
+    )
+    t0 = time.perf_counter()
+    n = len(pattern.findall(text))
+    return time.perf_counter() - t0, n
+
+
+def time_scanner(text: str) -> tuple[float, MarkerScan]:
+    t0 = time.perf_counter()
+    scan = MarkerScan(text).finish()
+    return time.perf_counter() - t0, scan
+
+
+def main() -> int:
+    full = "--full" in sys.argv[1:]
+
+    text = build_pathological(TOTAL_BYTES, N_BEGIN)
+    print(f"input: {len(text) / 1e6:.1f} MB, {N_BEGIN} unterminated <<{STEM}_BEGIN>> tags")
+
+    dt, scan = time_scanner(text)
+    unclosed = [i for i in scan.issues if i[0] == "unclosed"]
+    nested = [i for i in scan.issues if i[0] == "nested"]
+    print(f"  scanner  {dt * 1000:9.1f} ms   blocks={len(scan.spans.get(STEM, []))} "
+          f"unclosed={len(unclosed)} nested={len(nested)}")
+    print(f"           {scan.describe_issues(STEM)}")
+
+    if full:
+        legacy_text, label = text, "full input"
+    else:
+        legacy_text = build_pathological(TOTAL_BYTES // 10, N_BEGIN // 10)
+        label = f"{len(legacy_text) / 1e6:.1f} MB / {N_BEGIN // 10} tags slice"
+    dt_legacy, n = time_legacy(legacy_text)
+    print(f"  legacy   {dt_legacy * 1000:9.1f} ms   blocks={n}   ({label})")
+
+    dt_slice, _ = time_scanner(legacy_text)
+    if dt_slice > 0:
+        print(f"  speedup on the same input: {dt_legacy / dt_slice:,.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Bytes-per-command benchmark for the bot's head-only (HTTP Range) fetch.
+
+Serves notes/ from a local HTTP stand-in for raw.githubusercontent.com and
+runs the latest-block bot loaders (WEEK / QUICK / MACRO / LIV2) twice:
+
+  * range on  - the stand-in answers Range requests with 206, so
+                get_notes_head() reads only the head of each archive.
+  * range off - the stand-in ignores Range and sends the whole file (200),
+                which is the fallback path.
+
+The stand-in never compresses, so "full bytes" is the uncompressed file
+size. raw.githubusercontent.com gzips whole-file answers, so on GitHub the
+head-only saving is smaller than the ratio printed here.
+
+Each command is then rerun with its cache entry aged past NOTES_CACHE_TTL:
+it must answer from the stale copy at once, and the background refresh
+must revalidate with If-None-Match and get a body-less 304.
+
+The stand-in also serves the GitHub trees API listing of notes/ and a
+repository tarball, so the archive sync is measured too: once the
+background warm-up (MACRO_NOTES_PREFETCH=1) has loaded every file through
+one listing plus one tarball, the commands must cost nothing; once
+everything is stale all commands together must cost a single (304)
+listing request, as they do with GITHUB_TOKEN set. The per-command runs
+above have the warm-up turned off.
+
+Finally the commands run against NOTES_SOURCE = "local" (notes/ read from
+disk, no HTTP at all) and must return the same text.
+
+Checks that all runs return identical text and prints the bytes read.
+
+Run:
+    python bench_notes_fetch.py
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from functions import load_comments as lc
+
+NOTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "notes")
+
+COMMANDS = [
+    ("WEEKUSD", lambda: lc.load_live_week("usd")),
+    ("WEEKEUR", lambda: lc.load_live_week("eur")),
+    ("WEEKDM", lambda: lc.load_live_week("dm")),
+    ("WEEKEM", lambda: lc.load_live_week("em")),
+    ("QUICKUSD", lambda: lc.load_live_sheet("usd")),
+    ("QUICK2EUR", lambda: lc.load_live_sheet_n("eur", n=2)),
+    ("MACROUSD", lambda: lc.load_macro_note("usd")),
+    ("LIV2BRL", lambda: lc.load_liv2_macro_block("brl")),
+]
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler plus single-range `bytes=a-b` support."""
+
+    honour_range = True
+
+    def send_head(self):
+        if self.path.startswith("/repos/"):
+            return self._send_api()
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            return super().send_head()
+
+        st = os.stat(path)
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+
+        size = st.st_size
+        m = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if not (self.honour_range and m) or (if_range and if_range != etag):
+            with open(path, "rb") as f:
+                return self._send(200, f.read(), etag)
+
+        start = int(m.group(1))
+        end = min(int(m.group(2)) if m.group(2) else size - 1, size - 1)
+        if start >= size:
+            return self._send(416, b"", etag, {"Content-Range": f"bytes */{size}"})
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        return self._send(206, body, etag, {"Content-Range": f"bytes {start}-{end}/{size}"})
+
+    def _send_api(self):
+        """`git/trees/<ref>:notes` listing and `tarball/<ref>` of NOTES_DIR."""
+        names = sorted(n for n in os.listdir(NOTES_DIR)
+                       if os.path.isfile(os.path.join(NOTES_DIR, n)))
+        if "/git/trees/" in self.path:
+            tree = []
+            for name in names:
+                with open(os.path.join(NOTES_DIR, name), "rb") as f:
+                    tree.append({"path": name, "type": "blob", "sha": lc.git_blob_sha(f.read())})
+            body = json.dumps({"tree": tree, "truncated": False}).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+            return self._send(200, body, etag)
+        if "/tarball/" in self.path:
+            buf = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+                for name in names:
+                    tar.add(os.path.join(NOTES_DIR, name), f"repo-main/notes/{name}")
+            return self._send(200, buf.getvalue(), '"tarball"')
+        return self._send(404, b"", '"404"')
+
+    def _send(self, status, body, etag, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("ETag", etag)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(honour_range: bool):
+    RangeRequestHandler.honour_range = honour_range
+    handler = functools.partial(RangeRequestHandler, directory=NOTES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    lc.NOTES_BASE_URL = lc.GITHUB_API_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    lc._notes_tree.update(etag=None, blobs=None, checked_at=0.0)
+    lc._range_ignored = False
+    return server
+
+
+def age_cache() -> None:
+    """Push every cache entry (and the last tree listing) past the TTL."""
+    for notes in lc._notes_cache.values():
+        notes.fetched_at -= lc.NOTES_CACHE_TTL
+    lc._notes_tree["checked_at"] -= lc.NOTES_CACHE_TTL
+
+
+def wait_for_refreshes(timeout: float = 10.0) -> None:
+    """Block until the background revalidations started by lookups are done."""
+    deadline = time.monotonic() + timeout
+    while lc._refreshing and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+class CountingGet:
+    """Wraps lc.http_get and records the body size of every response."""
+
+    def __init__(self):
+        self.read = []
+
+    def __enter__(self):
+        self.original = lc.http_get
+
+        def counting_get(url, **kwargs):
+            r = self.original(url, **kwargs)
+            self.read.append(len(r.content))
+            return r
+
+        lc.http_get = counting_get
+        return self
+
+    def __exit__(self, *exc):
+        lc.http_get = self.original
+
+    def take(self) -> tuple:
+        totals = (sum(self.read), len(self.read))
+        self.read.clear()
+        return totals
+
+
+def run_commands(honour_range: bool) -> dict:
+    server = start_server(honour_range)
+    results = {}
+    try:
+        with CountingGet() as counter:
+            for label, command in COMMANDS:
+                lc._notes_cache.clear()
+                counter.take()
+                text = command()
+                cold = counter.take()
+
+                # Age every entry past the TTL: the rerun must revalidate.
+                age_cache()
+                again = command()
+                wait_for_refreshes()
+                results[label] = (text, cold, counter.take(), again == text)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def run_sync(expected: dict) -> bool:
+    """Cold start (tarball warm-up), then one stale round over every command."""
+    server = start_server(honour_range=True)
+    token = os.environ.get("GITHUB_TOKEN")
+    os.environ["GITHUB_TOKEN"] = token or "bench"  # the stand-in ignores it
+    try:
+        with CountingGet() as counter:
+            lc._notes_cache.clear()
+            lc.NOTES_COLD_PREFETCH, lc._cold_start_done = True, False
+            lc._warm_cold_cache()
+            lc._cold_start_thread.join()
+            texts = {label: command() for label, command in COMMANDS}
+            cold_bytes, cold_reqs = counter.take()
+            loaded = len(lc._notes_cache)
+
+            age_cache()
+            stale = {label: command() for label, command in COMMANDS}
+            wait_for_refreshes()
+            stale_bytes, stale_reqs = counter.take()
+    finally:
+        lc.NOTES_COLD_PREFETCH = False
+        if token is None:
+            del os.environ["GITHUB_TOKEN"]
+        server.shutdown()
+        server.server_close()
+
+    same = texts == stale == expected
+    print(f"sync: cold start loaded {loaded} files, {cold_bytes:,} B in "
+          f"{cold_reqs} requests for {len(COMMANDS)} commands; "
+          f"stale round {stale_bytes:,} B in {stale_reqs} request(s)")
+    return same and cold_reqs == 2 and stale_reqs == 1
+
+
+def run_local(expected: dict) -> bool:
+    """All commands against the local-directory source, cold then warm."""
+    source, local_dir = lc.NOTES_SOURCE, lc.NOTES_LOCAL_DIR
+    lc.NOTES_SOURCE, lc.NOTES_LOCAL_DIR = "local", NOTES_DIR
+    try:
+        with CountingGet() as counter:
+            lc._notes_cache.clear()
+            t0 = time.perf_counter()
+            cold = {label: command() for label, command in COMMANDS}
+            dt_cold = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            warm = {label: command() for label, command in COMMANDS}
+            dt_warm = time.perf_counter() - t0
+            _, requests_made = counter.take()
+    finally:
+        lc.NOTES_SOURCE, lc.NOTES_LOCAL_DIR = source, local_dir
+        lc._notes_cache.clear()
+
+    print(f"local source: {len(COMMANDS)} commands cold {dt_cold * 1000:.1f} ms, "
+          f"warm {dt_warm * 1e6 / len(COMMANDS):.0f} us/command, {requests_made} HTTP requests")
+    return cold == warm == expected and requests_made == 0
+
+
+def main() -> int:
+    # Per-command byte counts: no tarball warm-up (run_sync measures that).
+    lc.NOTES_COLD_PREFETCH = False
+    head = run_commands(honour_range=True)
+    full = run_commands(honour_range=False)
+
+    failures = 0
+    total_head = total_full = total_stale = 0
+    print(f"{'command':<10} {'full bytes':>12} {'head bytes':>12} {'requests':>9} "
+          f"{'ratio':>7} {'stale rerun':>12}")
+    for label, _ in COMMANDS:
+        h_text, (h_bytes, h_reqs), (s_bytes, s_reqs), h_same = head[label]
+        f_text, (f_bytes, _), _, f_same = full[label]
+        same = h_text == f_text and h_same and f_same
+        failures += not same
+        total_head += h_bytes
+        total_full += f_bytes
+        total_stale += s_bytes
+        ratio = f_bytes / h_bytes if h_bytes else float("inf")
+        flag = "" if same else "   MISMATCH"
+        print(f"{label:<10} {f_bytes:>12,} {h_bytes:>12,} {h_reqs:>9} {ratio:>6.1f}x "
+              f"{s_bytes:>9,} B/{s_reqs}{flag}")
+    print(f"{'total':<10} {total_full:>12,} {total_head:>12,} {'':>9} "
+          f"{total_full / max(total_head, 1):>6.1f}x {total_stale:>9,} B")
+
+    if not run_sync({label: head[label][0] for label, _ in COMMANDS}):
+        print("FAILED - archive sync returned different text or needed extra requests.")
+        return 1
+    if not run_local({label: head[label][0] for label, _ in COMMANDS}):
+        print("FAILED - the local source returned different text or used the network.")
+        return 1
+    if failures:
+        print(f"FAILED - {failures} command(s) differ between head-only, full and revalidated fetch.")
+        return 1
+    print("Head-only, full, revalidated (304), synced and local fetches return identical text.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,647 @@
 # functions/load_comments.py
+import io
+import json
+import os
 import requests
 import re
+import tarfile
+import threading
+import time
 from datetime import date, timedelta
 
+from requests.adapters import HTTPAdapter
+
+from functions.markers import MarkerScan
+from functions.notes_tree import (
+    NotesTreeError,
+    git_blob_sha,
+    github_api_headers,
+    list_notes_tree,
+)
+
+# === Source des notes (même config que le dashboard : MACRO_REPO_*) ===
+
+NOTES_REPO = "{}/{}".format(
+    os.environ.get("MACRO_REPO_OWNER", "jeangaga"),
+    os.environ.get("MACRO_REPO_NAME", "mon-mini-chat-bot"),
+)
+NOTES_BRANCH = os.environ.get("MACRO_REPO_BRANCH", "main")
+NOTES_DIR = os.environ.get("MACRO_REPO_NOTES_DIR", "notes")
+
+# Where the loaders read notes from:
+#   raw      - raw.githubusercontent.com (default)
+#   contents - GitHub Contents API (sends GITHUB_TOKEN, for private repos)
+#   http     - any HTTP mirror of notes/ at MACRO_NOTES_MIRROR_URL
+#   local    - a directory on disk, MACRO_NOTES_LOCAL_DIR (default: the
+#              notes/ folder of this checkout); no network at all
+NOTES_SOURCE = os.environ.get("MACRO_NOTES_SOURCE", "raw").lower()
+NOTES_LOCAL_DIR = os.environ.get("MACRO_NOTES_LOCAL_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), NOTES_DIR
+)
+
+NOTES_BASE_URL = (
+    os.environ.get("MACRO_NOTES_MIRROR_URL", "").rstrip("/")
+    if NOTES_SOURCE == "http"
+    else f"https://raw.githubusercontent.com/{NOTES_REPO}/{NOTES_BRANCH}/{NOTES_DIR}"
+)
+# Same archive seen through the GitHub API (contents / tree listing / tarball).
+GITHUB_API_URL = "https://api.github.com"
+
+# === Client HTTP partagé (keep-alive + pool de connexions) ===
+
+# Single place to tune network behaviour for every loader below.
+HTTP_TIMEOUT = 5            # seconds (connect + read)
+HTTP_POOL_CONNECTIONS = 4   # number of distinct hosts kept in the pool
+HTTP_POOL_MAXSIZE = 8       # keep-alive sockets per host
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return the process-wide requests.Session shared by every loader.
+
+    The session keeps TLS connections to raw.githubusercontent.com alive
+    between bot messages, so only the first MACRO/WEEK/QUICK/LIVE command
+    pays the handshake. Pool size is bounded per host.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared session, with the default HTTP_TIMEOUT."""
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    return get_http_session().get(url, **kwargs)
+
+
+def notes_get(filename: str, headers: dict = None) -> requests.Response:
+    """
+    GET one notes file from the configured HTTP source (raw, contents or
+    http mirror). Bodies without a declared charset are read as UTF-8.
+    """
+    if NOTES_SOURCE == "contents":
+        url = f"{GITHUB_API_URL}/repos/{NOTES_REPO}/contents/{NOTES_DIR}/{filename}"
+        headers = dict(headers or {}, **_github_api_headers())
+        headers["Accept"] = "application/vnd.github.raw"
+        r = http_get(url, headers=headers, params={"ref": NOTES_BRANCH})
+    else:
+        r = http_get(f"{NOTES_BASE_URL}/{filename}", headers=headers or {})
+    if r.encoding is None:
+        r.encoding = "utf-8"
+    return r
+
+
+# === Index des marqueurs par fichier (un téléchargement, un seul scan) ===
+
+# How long a downloaded notes file is reused across bot commands before it
+# is revalidated (conditional GET, usually a body-less 304).
+NOTES_CACHE_TTL = 30  # seconds
+# Past the TTL, a cached file is still answered at once while it is
+# revalidated in the background, for up to this long; after that the
+# lookup waits for GitHub.
+NOTES_CACHE_MAX_STALE = 10 * 60  # seconds
+
+
+class NotesFetchError(Exception):
+    """The notes server answered with a non-200 status."""
+
+    def __init__(self, filename: str, status_code: int):
+        super().__init__(f"HTTP {status_code}: {filename}")
+        self.filename = filename
+        self.status_code = status_code
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple:
+    """Offsets of text[start:end].strip(), without building either string."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class NotesFile:
+    """
+    One downloaded notes file, scanned at most once for its marker blocks.
+
+    Block text is only sliced out of `text` when a loader asks for it.
+    """
+
+    def __init__(self, filename: str, text: str, fetched_at: float, complete: bool = True):
+        self.filename = filename
+        self.text = text
+        self.fetched_at = fetched_at
+        self.scan = MarkerScan(text)
+        # False for a head-only download (see get_notes_head); `raw` and
+        # `encoding` then let the next lookup resume the range download.
+        self.complete = complete
+        self.raw = None
+        self.encoding = None
+        # HTTP validators used to revalidate the entry once it is stale.
+        self.etag = None
+        self.last_modified = None
+        # Git blob SHA of the full file, compared with the notes/ tree
+        # listing by sync_notes_cache(). None for a head-only download.
+        self.blob_sha = None
+
+    def spans(self, stem: str, n: int = None, triple: bool = False) -> list:
+        """
+        (start, end) offsets into `text` of the first `n` blocks for `stem`,
+        with surrounding whitespace excluded. Nothing is copied.
+        """
+        return [
+            _strip_span(self.text, start, end)
+            for start, end in self.scan.ensure(stem, n, triple=triple)
+        ]
+
+    def has_blocks(self, stem: str, n: int) -> bool:
+        """True once `n` blocks for `stem` are closed (scans, never slices)."""
+        return len(self.scan.ensure(stem, n)) >= n
+
+    def blocks(self, stem: str, n: int = None, triple: bool = False) -> list:
+        """
+        Stripped text of the first `n` blocks for `stem` (all if None).
+        The scan stops as soon as the n-th block is closed.
+        """
+        return [self.text[start:end] for start, end in self.spans(stem, n, triple)]
+
+    def not_found(self, message: str, stem: str) -> str:
+        """Append any marker diagnostics for `stem` to a loader's error."""
+        hint = self.scan.describe_issues(stem)
+        return f"{message}\n\n{hint}" if hint else message
+
+
+_notes_cache = {}
+_notes_cache_lock = threading.Lock()
+
+
+def _conditional_headers(notes: NotesFile) -> dict:
+    """If-None-Match / If-Modified-Since for revalidating a cached file."""
+    headers = {}
+    if notes.etag:
+        headers["If-None-Match"] = notes.etag
+    if notes.last_modified:
+        headers["If-Modified-Since"] = notes.last_modified
+    return headers
+
+
+def _remember_validators(notes: NotesFile, r: requests.Response) -> NotesFile:
+    notes.etag = r.headers.get("ETag")
+    notes.last_modified = r.headers.get("Last-Modified")
+    notes.blob_sha = git_blob_sha(r.content)
+    return notes
+
+
+_refreshing = set()  # filenames with a background revalidation running
+
+
+def _serve_stale(notes: NotesFile, now: float) -> bool:
+    age = now - notes.fetched_at
+    return NOTES_CACHE_TTL <= age < NOTES_CACHE_MAX_STALE
+
+
+def _refresh_later(filename: str, fetch, *args) -> None:
+    """
+    Revalidate `filename` on a background thread, at most one at a time per
+    file. The thread first gives sync_notes_cache() a chance to refresh the
+    whole cache with one listing, then runs `fetch(*args)`, which returns
+    straight away if the entry is fresh again. Errors leave the stale copy
+    in place; the next lookup simply tries again.
+    """
+    with _notes_cache_lock:
+        if filename in _refreshing:
+            return
+        _refreshing.add(filename)
+
+    def run():
+        try:
+            _sync_if_due(time.time())
+            fetch(*args)
+        except Exception:
+            pass
+        finally:
+            with _notes_cache_lock:
+                _refreshing.discard(filename)
+
+    threading.Thread(target=run, name=f"notes-refresh-{filename}", daemon=True).start()
+
+
+def _get_local_notes(filename: str) -> NotesFile:
+    """
+    NotesFile for `filename` read from NOTES_LOCAL_DIR. The cached copy is
+    kept as long as the file's mtime and size do not change (one stat per
+    lookup, no TTL). A missing file raises NotesFetchError(filename, 404),
+    like the HTTP sources. So does a name that would resolve outside
+    NOTES_LOCAL_DIR: filenames are built from chat input ("WEEK../../X").
+    """
+    root = os.path.realpath(NOTES_LOCAL_DIR)
+    path = os.path.realpath(os.path.join(root, filename))
+    if (
+        os.sep in filename
+        or (os.altsep and os.altsep in filename)
+        or ".." in filename
+        or os.path.dirname(path) != root
+    ):
+        raise NotesFetchError(filename, 404)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise NotesFetchError(filename, 404) from None
+    stamp = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+    with _notes_cache_lock:
+        cached = _notes_cache.get(filename)
+    if cached is not None and cached.etag == stamp:
+        return cached
+
+    with open(path, "rb") as f:
+        data = f.read()
+    notes = NotesFile(filename, data.decode("utf-8", errors="replace"), time.time())
+    notes.etag = stamp
+    with _notes_cache_lock:
+        _notes_cache[filename] = notes
+    return notes
+
+
+def get_notes_file(filename: str) -> NotesFile:
+    """
+    Return the indexed NotesFile for `filename`, downloading it at most once
+    per NOTES_CACHE_TTL. WEEK/LIVE/LIV2/LIV3 commands on the same file are
+    answered from the same download and the same scan.
+
+    Once the TTL is over the cached copy is still returned immediately and
+    revalidated in the background (stale-while-revalidate, see
+    _refresh_later), so a bot reply does not wait on GitHub. Only a copy
+    older than NOTES_CACHE_MAX_STALE, or no copy at all, is fetched inline.
+
+    With NOTES_SOURCE = "local" the file is read from NOTES_LOCAL_DIR
+    instead, see _get_local_notes().
+
+    Raises NotesFetchError on a non-200 answer; network errors propagate.
+    """
+    if NOTES_SOURCE == "local":
+        return _get_local_notes(filename)
+    _warm_cold_cache()
+    now = time.time()
+    with _notes_cache_lock:
+        cached = _notes_cache.get(filename)
+    if cached is not None and cached.complete and _serve_stale(cached, now):
+        _refresh_later(filename, _fetch_notes_file, filename)
+        return cached
+    return _fetch_notes_file(filename)
+
+
+def _fetch_notes_file(filename: str) -> NotesFile:
+    """
+    Blocking part of get_notes_file(). A stale cached copy is revalidated
+    with its ETag / Last-Modified; a 304 keeps it (and its scan) for another
+    TTL without downloading the body again.
+    """
+    now = time.time()
+    with _notes_cache_lock:
+        cached = _notes_cache.get(filename)
+    if cached is not None and not cached.complete:
+        cached = None
+    if cached is not None and now - cached.fetched_at < NOTES_CACHE_TTL:
+        return cached
+
+    headers = _conditional_headers(cached) if cached is not None else {}
+    r = notes_get(filename, headers)
+    if r.status_code == 304 and cached is not None:
+        cached.fetched_at = now
+        return cached
+    if r.status_code != 200:
+        raise NotesFetchError(filename, r.status_code)
+
+    notes = _remember_validators(NotesFile(filename, r.text, now), r)
+    with _notes_cache_lock:
+        _notes_cache[filename] = notes
+    return notes
+
+
+# First Range request size for head-only fetches; doubled on each retry.
+NOTES_HEAD_BYTES = 64 * 1024
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+# Set once the notes source answered a plain Range request with the whole
+# file (200): head lookups then use get_notes_file(), which lets the server
+# compress the body instead of asking for it uncompressed.
+_range_ignored = False
+
+
+def get_notes_head(filename: str, stem: str, n: int = 1) -> NotesFile:
+    """
+    Head-only variant of get_notes_file() for latest-block lookups.
+
+    The archives put the newest block first, so instead of the whole file
+    this asks for the first NOTES_HEAD_BYTES with an HTTP Range request and
+    keeps growing the range (doubling) until `n` complete `stem` blocks
+    have been seen or the file ends. If the server ignores Range (plain
+    200), the full body is used as-is, and from then on head lookups are
+    plain get_notes_file() calls, whose body the server may compress.
+
+    The returned NotesFile has complete=False when only a head was read.
+    A later lookup needing more blocks resumes the download from there
+    (with If-Range, so a file changed in between comes back whole).
+
+    A stale entry that already holds the `n` blocks is returned at once and
+    revalidated in the background, as in get_notes_file(). A local source
+    reads the whole file: it costs less than one HTTP round trip.
+    Raises NotesFetchError on any other non-2xx answer.
+    """
+    if NOTES_SOURCE == "local":
+        return _get_local_notes(filename)
+    if _range_ignored:
+        return get_notes_file(filename)
+    _warm_cold_cache()
+    now = time.time()
+    with _notes_cache_lock:
+        cached = _notes_cache.get(filename)
+    if (cached is not None and _serve_stale(cached, now)
+            and (cached.complete or cached.has_blocks(stem, n))):
+        _refresh_later(filename, _fetch_notes_head, filename, stem, n)
+        return cached
+    return _fetch_notes_head(filename, stem, n)
+
+
+def _fetch_notes_head(filename: str, stem: str, n: int) -> NotesFile:
+    """
+    Blocking part of get_notes_head(). A stale entry is revalidated on the
+    first request; 304 keeps it.
+    """
+    global _range_ignored
+    now = time.time()
+    with _notes_cache_lock:
+        cached = _notes_cache.get(filename)
+
+    validators = {}
+    if cached is not None and now - cached.fetched_at >= NOTES_CACHE_TTL:
+        validators = _conditional_headers(cached)
+        if not validators:
+            cached = None
+    elif cached is not None and (cached.complete or cached.has_blocks(stem, n)):
+        return cached
+
+    fetched_at, etag, last_modified = now, None, None
+    raw, encoding = b"", None
+    if cached is not None and not validators:
+        # Fresh partial head: resume it.
+        fetched_at, etag, last_modified = cached.fetched_at, cached.etag, cached.last_modified
+        raw, encoding = cached.raw, cached.encoding
+
+    size = max(NOTES_HEAD_BYTES, len(raw))
+    while True:
+        start = len(raw)
+        # identity: a range must index the file itself, not a gzip stream.
+        headers = {
+            "Range": f"bytes={start}-{start + size - 1}",
+            "Accept-Encoding": "identity",
+        }
+        if validators:
+            headers.update(validators)
+        elif start and etag:
+            headers["If-Range"] = etag
+        r = notes_get(filename, headers)
+
+        if r.status_code == 304 and validators:
+            # Unchanged upstream: keep what we have for another TTL.
+            validators = {}
+            cached.fetched_at = now
+            if cached.complete or cached.has_blocks(stem, n):
+                return cached
+            fetched_at, etag, last_modified = now, cached.etag, cached.last_modified
+            raw, encoding = cached.raw, cached.encoding
+            size = max(size, len(raw))
+            continue
+        validators = {}
+
+        if r.status_code == 200:
+            # Range ignored (or If-Range mismatch): this is the whole file.
+            if "If-Range" not in headers:
+                _range_ignored = True
+            notes = _remember_validators(NotesFile(filename, r.text, now), r)
+            break
+        if r.status_code == 416:
+            complete = True
+        elif r.status_code == 206:
+            if not start:
+                etag = r.headers.get("ETag")
+                last_modified = r.headers.get("Last-Modified")
+            raw += r.content
+            encoding = encoding or r.encoding or "utf-8"
+            m = _CONTENT_RANGE_RE.match(r.headers.get("Content-Range", ""))
+            complete = not r.content or bool(
+                m and m.group(3) != "*" and int(m.group(2)) + 1 >= int(m.group(3))
+            )
+        else:
+            raise NotesFetchError(filename, r.status_code)
+
+        notes = NotesFile(
+            filename,
+            raw.decode(encoding or "utf-8", errors="replace"),
+            fetched_at,
+            complete=complete,
+        )
+        notes.etag, notes.last_modified = etag, last_modified
+        if complete or notes.has_blocks(stem, n):
+            if complete:
+                notes.blob_sha = git_blob_sha(raw)
+            else:
+                notes.raw, notes.encoding = raw, encoding
+            break
+        size *= 2
+
+    with _notes_cache_lock:
+        _notes_cache[filename] = notes
+    return notes
+
+
+# === Synchronisation de l'archive (une requête pour tout notes/) ===
+
+# Last notes/ listing: blob SHA per filename, and the ETag to revalidate it.
+_notes_tree = {"etag": None, "blobs": None, "checked_at": 0.0}
+_notes_tree_lock = threading.Lock()
+
+# MACRO_NOTES_PREFETCH=1: on the first lookup, warm the cache from one
+# tarball on a background thread (_warm_cold_cache). Off by default: each
+# command then downloads only the file (or file head) it needs.
+NOTES_COLD_PREFETCH = os.environ.get("MACRO_NOTES_PREFETCH", "0") == "1"
+_cold_start_done = False
+_cold_start_thread = None
+
+
+def _github_api_headers() -> dict:
+    return github_api_headers(os.environ.get("GITHUB_TOKEN"))
+
+
+def _tree_sync_enabled() -> bool:
+    """
+    Background refreshes list notes/ only with GITHUB_TOKEN set. Without it
+    the trees API allows 60 requests/h per IP, 304s included, which one
+    listing per NOTES_CACHE_TTL would exceed; per-file revalidation against
+    raw.githubusercontent.com has no such limit.
+    """
+    return bool(os.environ.get("GITHUB_TOKEN"))
+
+
+def sync_notes_cache(prefetch: bool = False) -> dict:
+    """
+    Revalidate every cached notes file with a single request.
+
+    Lists the notes/ tree through the GitHub trees API and compares each
+    blob SHA with the one of the cached copy: unchanged files are kept for
+    another NOTES_CACHE_TTL, changed or deleted ones are dropped so the
+    next lookup downloads them again. The listing is sent with its ETag,
+    so when nothing moved upstream GitHub answers a body-less 304. A 304
+    only spares the rate limit on authenticated requests (GITHUB_TOKEN);
+    without a token every listing counts against the 60/h allowance.
+
+    With prefetch=True every new or changed file is (re)loaded from one
+    repository tarball instead of one request per file, which warms a cold
+    cache in a single round trip.
+
+    Only meaningful for the GitHub sources (NOTES_SOURCE raw / contents).
+    Returns counts: {"unchanged": ..., "evicted": ..., "loaded": ...}.
+    Raises NotesFetchError on a non-200/304 answer or a listing GitHub
+    truncated (list_notes_tree); network errors propagate.
+    """
+    now = time.time()
+    etag = _notes_tree["etag"] if _notes_tree["blobs"] is not None else None
+    try:
+        blobs, etag = list_notes_tree(
+            http_get, NOTES_REPO, NOTES_BRANCH, NOTES_DIR,
+            api_url=GITHUB_API_URL, token=os.environ.get("GITHUB_TOKEN"), etag=etag,
+        )
+    except NotesTreeError as e:
+        raise NotesFetchError(f"{NOTES_DIR}/ (tree)", e.status_code) from e
+    finally:
+        _notes_tree["checked_at"] = now
+
+    if blobs is None:
+        blobs = _notes_tree["blobs"]
+    else:
+        _notes_tree["etag"], _notes_tree["blobs"] = etag, blobs
+
+    stats = {"unchanged": 0, "evicted": 0, "loaded": 0}
+    with _notes_cache_lock:
+        for filename, notes in list(_notes_cache.items()):
+            if notes.blob_sha is None:
+                continue  # head-only copy: revalidated per file
+            if blobs.get(filename) == notes.blob_sha:
+                notes.fetched_at = now
+                stats["unchanged"] += 1
+            else:
+                del _notes_cache[filename]
+                stats["evicted"] += 1
+        missing = {
+            filename for filename, sha in blobs.items()
+            if getattr(_notes_cache.get(filename), "blob_sha", None) != sha
+        }
+
+    if prefetch and missing:
+        stats["loaded"] = _load_notes_tarball(missing, now)
+    return stats
+
+
+def _load_notes_tarball(filenames: set, fetched_at: float) -> int:
+    """Fill the cache with `filenames` taken from one repository tarball."""
+    url = f"{GITHUB_API_URL}/repos/{NOTES_REPO}/tarball/{NOTES_BRANCH}"
+    r = http_get(url, headers=_github_api_headers())
+    if r.status_code != 200:
+        raise NotesFetchError(f"{NOTES_DIR}/ (tarball)", r.status_code)
+
+    loaded = {}
+    with tarfile.open(fileobj=io.BytesIO(r.content), mode="r:*") as tar:
+        for member in tar:
+            # <owner>-<repo>-<sha>/notes/<filename>
+            parts = member.name.split("/")
+            if (not member.isfile() or len(parts) != 3 or parts[1] != NOTES_DIR
+                    or parts[2] not in filenames):
+                continue
+            data = tar.extractfile(member).read()
+            notes = NotesFile(parts[2], data.decode("utf-8", errors="replace"), fetched_at)
+            notes.blob_sha = git_blob_sha(data)
+            loaded[parts[2]] = notes
+
+    with _notes_cache_lock:
+        for filename, notes in loaded.items():
+            # A lookup may have fetched the same version meanwhile.
+            if getattr(_notes_cache.get(filename), "blob_sha", None) != notes.blob_sha:
+                _notes_cache[filename] = notes
+    return len(loaded)
+
+
+def _warm_cold_cache() -> None:
+    """
+    First lookup of the process with NOTES_COLD_PREFETCH on and the cache
+    still empty: start loading all of notes/ with
+    sync_notes_cache(prefetch=True), i.e. one listing plus one tarball, on
+    a background thread. The lookup itself does not wait and fetches its
+    own file; later commands find theirs in the cache. Tried once; if it
+    fails, lookups download their files one by one as before.
+    """
+    global _cold_start_done, _cold_start_thread
+    if _cold_start_done or not NOTES_COLD_PREFETCH or NOTES_SOURCE not in ("raw", "contents"):
+        return
+    with _notes_cache_lock:
+        if _cold_start_done:
+            return
+        _cold_start_done = True
+        if _notes_cache:
+            return
+
+    def run():
+        with _notes_tree_lock:
+            try:
+                sync_notes_cache(prefetch=True)
+            except Exception:
+                pass
+
+    _cold_start_thread = threading.Thread(target=run, name="notes-prefetch", daemon=True)
+    _cold_start_thread.start()
+
+
+def _sync_if_due(now: float) -> None:
+    """
+    Run sync_notes_cache() at most once per NOTES_CACHE_TTL, and only when
+    some cached entry is stale and GITHUB_TOKEN is set (_tree_sync_enabled).
+    Called from background refreshes: one that finds another sync running
+    waits for it rather than listing twice. If the listing cannot be had
+    (no token, network, rate limit), the refresh falls back to per-file
+    revalidation.
+    """
+    if NOTES_SOURCE not in ("raw", "contents") or not _tree_sync_enabled():
+        return
+    with _notes_tree_lock:
+        if now - _notes_tree["checked_at"] < NOTES_CACHE_TTL:
+            return
+        with _notes_cache_lock:
+            stale = any(
+                notes.blob_sha is not None and now - notes.fetched_at >= NOTES_CACHE_TTL
+                for notes in _notes_cache.values()
+            )
+        if not stale:
+            return
+        try:
+            sync_notes_cache()
+        except Exception:
+            _notes_tree["checked_at"] = now
+
+
 # === Fonction principale pour les actions ===
 
 import requests
@@ -22,28 +661,26 @@ def load_stock_comment(code: str) -> str:
     if not ticker:
         return "❌ Invalid ticker (empty)."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = "STOCKS_LIVE_NOTE.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"LIVE_{ticker}_MACRO"
 
-    begin_tag = f"<<LIVE_{ticker}_MACRO_BEGIN>>"
-    end_tag   = f"<<LIVE_{ticker}_MACRO_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ No STOCKS live note file (HTTP {r.status_code}): {filename}"
+        notes = get_notes_head(filename, stem, 1)
+    except NotesFetchError as e:
+        return f"❌ No STOCKS live note file (HTTP {e.status_code}): {filename}"
     except Exception as e:
         return f"❌ Error loading STOCKS live note: {e}"
 
-    text = r.text
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks(stem, 1)
 
     if not matches:
-        return (
+        return notes.not_found(
             f"❌ LIVE stock markers not found for {ticker} in {filename}: "
-            f"{begin_tag} ... {end_tag}"
+            f"{begin_tag} ... {end_tag}",
+            stem,
         )
 
     return matches[0].strip()
@@ -54,7 +691,7 @@ def load_stock_comment(code: str) -> str:
 
 
 def load_stock_comment_old(code: str):
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes/"
+    base_url = NOTES_BASE_URL + "/"
     found_data = None
     used_date = None
 
@@ -74,7 +711,7 @@ def load_stock_comment_old(code: str):
         check_date = (date.today() - timedelta(days=i)).strftime("%Y%m%d")
         url = f"{base_url}stocks_daily_fundamental_feed_{check_date}.json"
         try:
-            r = requests.get(url, timeout=5)
+            r = http_get(url)
             if r.status_code == 200:
                 found_data = r.json()
                 used_date = check_date
@@ -139,12 +776,9 @@ def load_stock_comment_old(code: str):
 
 # === Fonction équivalente pour les indices ===
 def load_index_comment(code: str):
-    url = f"https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes/{code}.json"
     try:
-        r = requests.get(url)
-        if r.status_code != 200:
-            return f"❌ Aucun commentaire trouvé pour {code}."
-        data = r.json()
+        notes = get_notes_file(f"{code}.json")
+        data = json.loads(notes.text)
         tag_date = data.get("date", "n/a")
         close_val = data.get("close", "n/a")
         sentiment = data.get("retail_sentiment", "n/a")
@@ -159,6 +793,8 @@ def load_index_comment(code: str):
             f"💬 **Commentaire :** {comment}"
         )
 
+    except NotesFetchError:
+        return f"❌ Aucun commentaire trouvé pour {code}."
     except Exception as e:
         return f"Erreur lors du chargement du commentaire {code} : {e}"
 
@@ -175,19 +811,15 @@ def load_us_macro_comment() -> str:
     et renvoie le DERNIER bloc entre
     <<<US_MACRO_NOTE_BEGIN>>> et <<<US_MACRO_NOTE_END>>>.
     """
-    url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes/US_macro_latest.txt"
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ Aucun commentaire US macro trouvé (HTTP {r.status_code})."
+        notes = get_notes_file("US_macro_latest.txt")
+    except NotesFetchError as e:
+        return f"❌ Aucun commentaire US macro trouvé (HTTP {e.status_code})."
     except Exception as e:
         return f"Erreur lors du chargement du commentaire US macro : {e}"
 
-    text = r.text
-
-    # Tous les blocs entre les balises
-    pattern = r"<<<US_MACRO_NOTE_BEGIN>>>(.*?)<<<US_MACRO_NOTE_END>>>"
-    matches = re.findall(pattern, text, flags=re.S)
+    # Tous les blocs entre les balises (forme <<<...>>> uniquement)
+    matches = notes.blocks("US_MACRO_NOTE", triple=True)
 
     if not matches:
         return "❌ Aucune balise <<<US_MACRO_NOTE_BEGIN>>> ... <<<US_MACRO_NOTE_END>>> trouvée dans US_macro_latest.txt."
@@ -203,19 +835,14 @@ def load_eur_macro_comment() -> str:
     et renvoie le PREMIER bloc entre
     <<<EUR_MACRO_NOTE_BEGIN>>> et <<<EUR_MACRO_NOTE_END>>>.
     """
-    url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes/EUR_MACRO_NOTE.txt"
-
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ Aucun commentaire EUR macro trouvé (HTTP {r.status_code})."
+        notes = get_notes_file("EUR_MACRO_NOTE.txt")
+    except NotesFetchError as e:
+        return f"❌ Aucun commentaire EUR macro trouvé (HTTP {e.status_code})."
     except Exception as e:
         return f"Erreur lors du chargement du commentaire EUR macro : {e}"
 
-    text = r.text
-
-    pattern = r"<<<EUR_MACRO_NOTE_BEGIN>>>(.*?)<<<EUR_MACRO_NOTE_END>>>"
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks("EUR_MACRO_NOTE", 1, triple=True)
 
     if not matches:
         return (
@@ -236,26 +863,23 @@ def load_live_week(region: str) -> str:
     if not reg:
         return "❌ Invalid region (empty)."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = f"{reg}_WEEK.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"{reg}_WEEK"
 
-    begin_tag = f"<<{reg}_WEEK_BEGIN>>"
-    end_tag = f"<<{reg}_WEEK_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ No LIVE macro file for {reg} (HTTP {r.status_code}): {filename}"
+        notes = get_notes_head(filename, stem, 1)
+    except NotesFetchError as e:
+        return f"❌ No LIVE macro file for {reg} (HTTP {e.status_code}): {filename}"
     except Exception as e:
         return f"❌ Error loading LIVE macro for {reg}: {e}"
 
-    text = r.text
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks(stem, 1)
 
     if not matches:
-        return f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}"
+        return notes.not_found(f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}", stem)
 
     return matches[0].strip()
 
@@ -268,26 +892,23 @@ def load_live_sheet(region: str) -> str:
     if not reg:
         return "❌ Invalid region (empty)."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = "WEEKPM.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"{reg}_WEEK_PM_STYLE"
 
-    begin_tag = f"<<{reg}_WEEK_PM_STYLE_BEGIN>>"
-    end_tag = f"<<{reg}_WEEK_PM_STYLE_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ No LIVE macro file for {reg} (HTTP {r.status_code}): {filename}"
+        notes = get_notes_head(filename, stem, 1)
+    except NotesFetchError as e:
+        return f"❌ No LIVE macro file for {reg} (HTTP {e.status_code}): {filename}"
     except Exception as e:
         return f"❌ Error loading LIVE macro for {reg}: {e}"
 
-    text = r.text
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks(stem, 1)
 
     if not matches:
-        return f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}"
+        return notes.not_found(f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}", stem)
 
     return matches[0].strip()
 
@@ -298,26 +919,23 @@ def load_live_sheet_n(region: str, n: int = 1) -> str:
     if not reg:
         return "❌ Invalid region (empty)."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = "WEEKPM.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"{reg}_WEEK_PM_STYLE"
 
-    begin_tag = f"<<{reg}_WEEK_PM_STYLE_BEGIN>>"
-    end_tag = f"<<{reg}_WEEK_PM_STYLE_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ No PM-style file for {reg} (HTTP {r.status_code}): {filename}"
+        notes = get_notes_head(filename, stem, n)
+    except NotesFetchError as e:
+        return f"❌ No PM-style file for {reg} (HTTP {e.status_code}): {filename}"
     except Exception as e:
         return f"❌ Error loading PM-style file for {reg}: {e}"
 
-    text = r.text
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks(stem, n)
 
     if not matches:
-        return f"❌ PM-style markers not found in {filename}: {begin_tag} ... {end_tag}"
+        return notes.not_found(f"❌ PM-style markers not found in {filename}: {begin_tag} ... {end_tag}", stem)
 
     blocks = [m.strip() for m in matches[:n]]
 
@@ -350,30 +968,26 @@ def load_macro_note(region: str) -> str:
     if not reg:
         return "❌ Région invalide (vide)."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = f"{reg}_MACRO_NOTE.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"{reg}_MACRO_NOTE"
 
-    begin_tag = f"<<{reg}_MACRO_NOTE_BEGIN>>"
-    end_tag = f"<<{reg}_MACRO_NOTE_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ Aucun fichier macro trouvé pour {reg} (HTTP {r.status_code}) : {filename}"
+        notes = get_notes_head(filename, stem, 1)
+    except NotesFetchError as e:
+        return f"❌ Aucun fichier macro trouvé pour {reg} (HTTP {e.status_code}) : {filename}"
     except Exception as e:
         return f"Erreur lors du chargement de la note macro {reg} : {e}"
 
-    text = r.text
-
-    # Escape tags in case they ever contain regex-significant chars
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks(stem, 1)
 
     if not matches:
-        return (
+        return notes.not_found(
             f"❌ Balises introuvables dans {filename} : "
-            f"{begin_tag} ... {end_tag}"
+            f"{begin_tag} ... {end_tag}",
+            stem,
         )
 
     # FIRST block in file order
@@ -392,26 +1006,23 @@ def load_live_macro_block(region: str) -> str:
     if not reg:
         return "❌ Invalid region (empty)."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = f"{reg}_WEEK_LIVE_MACRO.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"{reg}_WEEK"
 
-    begin_tag = f"<<{reg}_WEEK_BEGIN>>"
-    end_tag = f"<<{reg}_WEEK_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ No LIVE macro file for {reg} (HTTP {r.status_code}): {filename}"
+        notes = get_notes_head(filename, stem, 1)
+    except NotesFetchError as e:
+        return f"❌ No LIVE macro file for {reg} (HTTP {e.status_code}): {filename}"
     except Exception as e:
         return f"❌ Error loading LIVE macro for {reg}: {e}"
 
-    text = r.text
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks(stem, 1)
 
     if not matches:
-        return f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}"
+        return notes.not_found(f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}", stem)
 
     return matches[0].strip()
 
@@ -559,26 +1170,23 @@ def load_liv2_macro_block(region: str) -> str:
     if not reg:
         return "❌ Invalid region (empty)."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = f"{reg}_MACRO_NOTE.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"LIVE_{reg}_MACRO"
 
-    begin_tag = f"<<LIVE_{reg}_MACRO_BEGIN>>"
-    end_tag = f"<<LIVE_{reg}_MACRO_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ No LIVE macro file for {reg} (HTTP {r.status_code}): {filename}"
+        notes = get_notes_head(filename, stem, 2)
+    except NotesFetchError as e:
+        return f"❌ No LIVE macro file for {reg} (HTTP {e.status_code}): {filename}"
     except Exception as e:
         return f"❌ Error loading LIVE macro for {reg}: {e}"
 
-    text = r.text
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
+    matches = notes.blocks(stem, 2)
 
     if not matches:
-        return f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}"
+        return notes.not_found(f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}", stem)
 
     # Take first two blocks if available
     first = matches[0].strip()
@@ -600,34 +1208,49 @@ def load_liv3_macro_block(region: str) -> str:
     Block markers:
       <<LIVE_<REGION>_MACRO_BEGIN>> ... <<LIVE_<REGION>_MACRO_END>>
     """
+    return load_livn_macro_block(region, 3)
+
+
+def load_livn_macro_block(region: str, n: int) -> str:
+    """
+    Load the FIRST N LIVE macro blocks for a given region from GitHub
+    and output them concatenated (separated by blank lines).
+    Backs the LIV<N><REGION>[:Country] bot command.
+
+    File convention (same as existing functions):
+      notes/<REGION>_MACRO_NOTE.txt   (e.g., USD_MACRO_NOTE.txt)
+
+    Block markers:
+      <<LIVE_<REGION>_MACRO_BEGIN>> ... <<LIVE_<REGION>_MACRO_END>>
+
+    Blocks are newest-first, so the marker scan stops right after the
+    N-th block instead of walking the whole archive.
+    """
     reg = region.strip().upper()
     if not reg:
         return "❌ Invalid region (empty)."
+    if n < 1:
+        return f"❌ Invalid block count: {n}."
 
-    base_url = "https://raw.githubusercontent.com/jeangaga/mon-mini-chat-bot/main/notes"
     filename = f"{reg}_MACRO_NOTE.txt"
-    url = f"{base_url}/{filename}"
+    stem = f"LIVE_{reg}_MACRO"
 
-    begin_tag = f"<<LIVE_{reg}_MACRO_BEGIN>>"
-    end_tag = f"<<LIVE_{reg}_MACRO_END>>"
+    begin_tag = f"<<{stem}_BEGIN>>"
+    end_tag = f"<<{stem}_END>>"
 
     try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return f"❌ No LIVE macro file for {reg} (HTTP {r.status_code}): {filename}"
+        notes = get_notes_head(filename, stem, n)
+    except NotesFetchError as e:
+        return f"❌ No LIVE macro file for {reg} (HTTP {e.status_code}): {filename}"
     except Exception as e:
         return f"❌ Error loading LIVE macro for {reg}: {e}"
 
-    text = r.text
-    pattern = re.escape(begin_tag) + r"(.*?)" + re.escape(end_tag)
-    matches = re.findall(pattern, text, flags=re.S)
-
-    if not matches:
-        return f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}"
+    blocks = notes.blocks(stem, n)
 
-    blocks = [m.strip() for m in matches[:3]]
+    if not blocks:
+        return notes.not_found(f"❌ LIVE markers not found in {filename}: {begin_tag} ... {end_tag}", stem)
 
-    if len(blocks) < 3:
+    if len(blocks) < n:
         blocks.append("⚠️ Only " + str(len(blocks)) + " LIVE block(s) found.")
 
     return "\n\n".join(blocks)
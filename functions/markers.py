@@ -0,0 +1,133 @@
+# functions/markers.py
+"""
+Tokenizer for the <<STEM_BEGIN>> / <<STEM_END>> markers of the notes files.
+
+Shared by the bot (functions/load_comments.py) and the dashboard. The
+dashboard fingerprints this module to version its parse cache, so any edit
+here invalidates every cached parse: keep HTTP and bot code out of it.
+"""
+import re
+import threading
+
+# Any <<STEM_BEGIN>> / <<STEM_END>> marker; older notes use <<<...>>>.
+_MARKER_RE = re.compile(r"<<(<?)([A-Z0-9_]+)_(BEGIN|END)>>(>?)")
+
+
+class MarkerScan:
+    """
+    Linear-time, resumable tokenizer for <<STEM_BEGIN>> / <<STEM_END>> markers.
+
+    One left-to-right pass with a single combined marker regex, so a
+    missing or misspelled END costs nothing extra (the old BEGIN(.*?)END
+    regex rescanned to the end of the file from every BEGIN). The pass is
+    lazy: `ensure(stem, n)` only reads as far as the n-th closed block of
+    `stem`, and later calls resume where the previous one stopped. The
+    archives are newest-first, so latest-block lookups stop near the top.
+
+    Pairing mirrors re.findall(BEGIN(.*?)END) per stem: a BEGIN opens a
+    block and the next END of the same stem closes it. Anything else is
+    recorded in `issues` as (kind, stem, offset):
+      - "nested":    BEGIN while the same stem is already open (ignored)
+      - "stray_end": END with no open BEGIN (ignored)
+      - "unclosed":  BEGIN still open at end of file (no block)
+
+    `spans` maps stem -> [(start, end), ...] in file order. `triple_spans`
+    holds the same for blocks written entirely with <<<...>>> markers.
+    Both, and `issues`, are only complete once `done` is True.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.spans = {}
+        self.triple_spans = {}
+        self.issues = []
+        self.done = False
+
+        self._matches = _MARKER_RE.finditer(text)
+        self._open_at = {}
+        self._open_triple = {}
+        self._lock = threading.Lock()
+
+    def ensure(self, stem: str, n: int = None, triple: bool = False) -> list:
+        """
+        Advance the scan until `stem` has `n` closed blocks (or the file
+        ends) and return its spans. n=None scans the whole file.
+        """
+        found = self.triple_spans if triple else self.spans
+        with self._lock:
+            while not self.done and (n is None or len(found.get(stem, ())) < n):
+                self._step()
+        spans = found.get(stem, [])
+        return spans if n is None else spans[:n]
+
+    def finish(self) -> "MarkerScan":
+        with self._lock:
+            while not self.done:
+                self._step()
+        return self
+
+    def _step(self):
+        m = next(self._matches, None)
+        if m is None:
+            for stem, (begin, _) in self._open_at.items():
+                self.issues.append(("unclosed", stem, begin))
+            self.issues.sort(key=lambda issue: issue[2])
+            self.done = True
+            return
+
+        triple = bool(m.group(1) and m.group(4))
+        stem, kind = m.group(2), m.group(3)
+        if kind == "BEGIN":
+            if stem in self._open_at:
+                self.issues.append(("nested", stem, m.start()))
+            else:
+                self._open_at[stem] = (m.start(), m.end())
+            if triple:
+                self._open_triple.setdefault(stem, m.end())
+            return
+
+        opened = self._open_at.pop(stem, None)
+        if opened is None:
+            self.issues.append(("stray_end", stem, m.start()))
+        else:
+            self.spans.setdefault(stem, []).append((opened[1], m.start()))
+        if triple:
+            start = self._open_triple.pop(stem, None)
+            if start is not None:
+                self.triple_spans.setdefault(stem, []).append((start, m.start()))
+
+    def line_of(self, offset: int) -> int:
+        return line_of(self.text, offset)
+
+    def describe_issues(self, stem: str, limit: int = 3) -> str:
+        """Human-readable summary of the marker issues for `stem`, or ""."""
+        self.finish()
+        return describe_issues(self.text, self.issues, stem, limit)
+
+
+def line_of(text: str, offset: int) -> int:
+    return text.count("\n", 0, offset) + 1
+
+
+_ISSUE_LABELS = {
+    "nested": "BEGIN repeated before END",
+    "stray_end": "END without BEGIN",
+    "unclosed": "BEGIN without END",
+}
+
+
+def describe_issues(text: str, issues, stem: str, limit: int = 3) -> str:
+    """
+    Human-readable summary of the MarkerScan `issues` for `stem` in `text`,
+    or "" when there are none.
+    """
+    found = [i for i in issues if i[1] == stem]
+    if not found:
+        return ""
+    parts = [
+        f"{_ISSUE_LABELS[kind]} (line {line_of(text, offset)})"
+        for kind, _, offset in found[:limit]
+    ]
+    if len(found) > limit:
+        parts.append(f"+{len(found) - limit} more")
+    return "⚠️ " + stem + ": " + "; ".join(parts)
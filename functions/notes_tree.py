@@ -0,0 +1,72 @@
+# functions/notes_tree.py
+"""
+The notes/ folder as listed by the GitHub trees API: one request gives the
+git blob SHA of every file, i.e. a version for each file.
+
+Shared by the bot (sync_notes_cache in functions/load_comments.py) and the
+dashboard (upstream file versions in streamlit_app.py).
+"""
+import hashlib
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+class NotesTreeError(Exception):
+    """The trees API answered with an error, or with a listing we cannot use."""
+
+    def __init__(self, status_code: int, reason: str = ""):
+        message = f"HTTP {status_code}: notes tree"
+        if reason:
+            message += f" ({reason})"
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+
+
+def github_api_headers(token: str = None) -> dict:
+    headers = {"Accept": "application/vnd.github+json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def list_notes_tree(get, repo: str, branch: str, notes_dir: str, *,
+                    api_url: str = GITHUB_API_URL, token: str = None,
+                    etag: str = None) -> tuple:
+    """
+    {filename: blob SHA} of the files directly under `notes_dir` on `branch`
+    of `repo` ("owner/name"), from one trees API request sent with `get`
+    (requests.get, or a session's get).
+
+    Returns (blobs, etag). With `etag` from a previous listing the request
+    is conditional: blobs is None when GitHub answers 304 (nothing moved).
+    Raises NotesTreeError on any other status, on a body that is not a
+    listing, and when GitHub truncated it (some files would be missing, and
+    look deleted). Network errors propagate.
+    """
+    url = f"{api_url}/repos/{repo}/git/trees/{branch}:{notes_dir}"
+    headers = github_api_headers(token)
+    if etag:
+        headers["If-None-Match"] = etag
+    r = get(url, headers=headers)
+    if r.status_code == 304 and etag:
+        return None, etag
+    if r.status_code != 200:
+        raise NotesTreeError(r.status_code)
+    try:
+        listing = r.json()
+    except ValueError:
+        raise NotesTreeError(r.status_code, "not JSON") from None
+    if listing.get("truncated"):
+        raise NotesTreeError(r.status_code, "truncated")
+    blobs = {
+        entry["path"]: entry["sha"]
+        for entry in listing.get("tree", [])
+        if entry.get("type") == "blob"
+    }
+    return blobs, r.headers.get("ETag")
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 git gives a blob with this content (as listed by the trees API)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
@@ -1,21 +1,41 @@
 """Macro FX Feed Dashboard - Streamlit entry point."""
 from __future__ import annotations
 
+import contextlib
 import datetime as _dt
+import functools
+import hashlib
+import inspect
+import multiprocessing
+import os
+import pickle
+import shutil
+import threading
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
 
 import pandas as pd
+import requests
 import streamlit as st
 
+import core.config
+import core.parsers
+import utils.text
 from core.config import (
     ALL_NOTE_FILES,
     ALL_SCOPES,
     ALL_THEMES,
+    BLOCK_STEMS,
+    CACHE_DIR,
+    CACHE_TTL_SECONDS,
     COUNTRY_SOURCE_PRIORITY,
     CURRENCY_SCOPES_DM,
     CURRENCY_SCOPES_EM,
     GITHUB_BRANCH,
+    GITHUB_NOTES_DIR,
     GITHUB_OWNER,
     GITHUB_REPO,
+    GITHUB_TOKEN,
     PM_SCOPES,
     REGION_SCOPES,
     SCOPE_COUNTRIES,
@@ -25,7 +45,7 @@ from core.config import (
     default_catalogue_country,
     sources_for_country,
 )
-from core.loaders import LoadResult, load_file, load_many
+from core.loaders import LoadResult, load_file
 from core.normalize import (
     catalogue_key,
     dedup_releases,
@@ -33,12 +53,12 @@ from core.normalize import (
     release_key,
 )
 from core.parsers import (
+    Block,
     block_data_window,
-    extract_blocks,
     extract_central_bank_tape_text,
     extract_macro_note_versions,
     extract_releases,
-    releases_from_load_results,
+    split_block_by_data_window,
     split_top_level_sections,
 )
 from core.render import (
@@ -51,6 +71,9 @@ from core.render import (
     source_badge,
 )
 from core.search import filter_releases
+import functions.markers
+from functions.markers import MarkerScan, describe_issues
+from functions.notes_tree import NotesTreeError, git_blob_sha, list_notes_tree
 from utils.text import parse_release_date
 
 st.set_page_config(
@@ -68,21 +91,687 @@ def _cached_load_file(filename, version):
     return load_file(filename)
 
 
-@st.cache_data(ttl=300, show_spinner=False)
-def _cached_load_many(filenames, version):
-    return load_many(list(filenames))
+# How often an unknown upstream listing (GitHub unreachable) is retried.
+UPSTREAM_RETRY_SECONDS = 300
+
+
+def _list_upstream_versions():
+    """{filename: blob SHA} for the notes folder, from one GitHub trees API
+    request; None when GitHub cannot be reached or the listing is unusable."""
+    try:
+        blobs, _etag = list_notes_tree(
+            functools.partial(requests.get, timeout=10),
+            f"{GITHUB_OWNER}/{GITHUB_REPO}", GITHUB_BRANCH, GITHUB_NOTES_DIR,
+            token=GITHUB_TOKEN,
+        )
+    except (requests.RequestException, NotesTreeError):
+        return None
+    return blobs
+
+
+def _upstream_versions():
+    """The listing the shared Archive works from.
+
+    Once it is older than CACHE_TTL_SECONDS (MACRO_CACHE_TTL) it is taken
+    again on a background thread and only the changed SHAs are swapped in
+    (_apply_listing); the rerun that noticed carries on with the current
+    one. {} = unknown: GitHub could not be listed, which is retried (in the
+    foreground, there is nothing to serve meanwhile) every
+    UPSTREAM_RETRY_SECONDS."""
+    archive = _archive()
+    age = time.time() - archive.versions_checked_at
+    if not archive.versions:
+        if age >= UPSTREAM_RETRY_SECONDS:
+            archive.versions_checked_at = time.time()
+            archive.versions = _list_upstream_versions() or {}
+    elif age >= CACHE_TTL_SECONDS:
+        _relist_in_background()
+    return archive.versions
+
+
+def _apply_listing(archive, new):
+    """Swap the SHAs that differ between `new` and archive.versions into a
+    new dict (readers keep a consistent one) and return the changed files,
+    sorted. A failed listing (None) keeps the current versions."""
+    archive.versions_checked_at = time.time()
+    if new is None:
+        return []
+    old = archive.versions
+    changed = sorted(f for f in set(old) | set(new) if old.get(f) != new.get(f))
+    if changed:
+        versions = dict(old)
+        for f in changed:
+            if f in new:
+                versions[f] = new[f]
+            else:
+                del versions[f]
+        archive.versions = versions
+    return changed
+
+
+def _relist_in_background():
+    """Re-list upstream versions on a daemon thread, one at a time."""
+    archive = _archive()
+    if not archive.claim("listing"):
+        return
+
+    def run():
+        try:
+            _apply_listing(archive, _list_upstream_versions())
+        finally:
+            archive.release("listing")
+
+    threading.Thread(target=run, name="upstream-listing", daemon=True).start()
+
+
+def _refresh_changed_files():
+    """Re-list upstream versions now and return the files whose content
+    changed since the listing the Archive was using (the background
+    re-listing may already have swapped some in).
+
+    Only those files get new cache keys, so every other cached file and
+    parse stays warm for every session. Returns None when the versions are
+    unknown (GitHub unreachable now or at the previous listing); the cached
+    files are then all dropped, as a plain refresh used to do.
+    """
+    archive = _archive()
+    new = _list_upstream_versions()
+    if not archive.versions or not new:
+        archive.versions, archive.versions_checked_at = new or {}, time.time()
+        _cached_load_file.clear()
+        return None
+    return _apply_listing(archive, new)
+
+
+def _source_fingerprint(*modules):
+    """Short hash of the modules' source code; changes whenever they do."""
+    h = hashlib.sha1()
+    for module in modules:
+        h.update(inspect.getsource(module).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def _known_stems():
+    """BLOCK_STEMS flattened, first occurrence wins (extract_blocks order)."""
+    return list(dict.fromkeys(s for stems in BLOCK_STEMS.values() for s in stems))
+
+
+def _extract_marker_blocks(text, source_file):
+    """extract_blocks(text, source_file, split_weekly=False) in one pass.
+
+    extract_blocks runs one BEGIN(.*?)END scan per known stem. Here a single
+    MarkerScan (functions/markers.py) finds every marker, pairs them per stem
+    with the same first-END semantics, and the stem comes from the marker
+    itself. Blocks come out in the same order (known-stem order, then file
+    order) with the same text, including the stray `>` / `<` that the
+    per-stem regex leaves around <<<...>>> markers.
+
+    Returns (blocks, unknown_stems, issues): stems with blocks that are not
+    in BLOCK_STEMS (skipped, like extract_blocks does) and MarkerScan issues.
+    """
+    if not text:
+        return [], [], []
+    scan = MarkerScan(text).finish()
+    blocks = []
+    for stem in _known_stems():
+        for start, end in scan.spans.get(stem, ()):
+            # <<<STEM_BEGIN>>> / <<<STEM_END>>>: the "<<STEM_..>>" regex
+            # matches one bracket in, keeping the outer ones in the text.
+            if text.startswith(">>>", start - 3):
+                start -= 1
+            if text.startswith("<<<", end):
+                end += 1
+            inner = text[start:end].strip()
+            if inner:
+                blocks.append(Block(stem=stem, source_file=source_file, raw_text=inner))
+    if not blocks:
+        base = source_file.rsplit("/", 1)[-1]
+        stem = base.rsplit(".", 1)[0].upper() if "." in base else base.upper()
+        blocks = [Block(stem=stem, source_file=source_file, raw_text=text)]
+    known = set(_known_stems())
+    unknown = sorted(stem for stem in scan.spans if stem not in known)
+    return blocks, unknown, scan.issues
+
+
+# Parsed files are cached on disk (ParseStore), keyed by (filename, content
+# SHA, PARSER_VERSION): a restart or a second worker reuses any parse already
+# done, and editing the parser (or the config / text helpers it depends on)
+# invalidates every entry without anyone bumping a number.
+PARSER_VERSION = _source_fingerprint(
+    core.parsers, core.config, utils.text, functions.markers, _extract_marker_blocks
+)
+
+
+def _text_sha(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _block_sha(block):
+    """Content hash of a marker block: its text plus every field that ends
+    up on the blocks and releases parsed from it."""
+    h = hashlib.sha1()
+    h.update(repr((block.stem, block.source_file, block.data_window,
+                   block.data_window_start, block.data_window_end)).encode("utf-8"))
+    h.update(block.raw_text.encode("utf-8"))
+    return h.hexdigest()
+
+
+# Size cap of the on-disk parse store: MACRO_PARSE_CACHE_MB (default 256).
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("MACRO_PARSE_CACHE_MB") or 256) * 1024 * 1024
+
+
+class ParseStore:
+    """Pickled parses on disk, one file per key, under
+    <root>/<PARSER_VERSION>/. Bounded: opening the store deletes the
+    directories of every other parser version, and once the entries total
+    more than `max_bytes` the least recently used ones are deleted. Several
+    processes may share it; a missing, half-written or unreadable entry is
+    a miss."""
+
+    def __init__(self, root, version, max_bytes):
+        self.dir = os.path.join(root, version)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+        for name in os.listdir(root):
+            if name != version:
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        self._bytes = sum(size for _path, _mtime, size in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.dir, hashlib.sha1(repr(key).encode("utf-8")).hexdigest())
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.dir):
+            try:
+                info = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry.path, info.st_mtime, info.st_size))
+        return entries
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)  # recently used: pruned last
+        except Exception:  # missing, truncated or unreadable: a miss
+            return None
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except (OSError, pickle.PicklingError):
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            return
+        with self._lock:
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._prune()
+
+    def _prune(self):
+        """Delete least recently used entries down to 3/4 of the cap."""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _path, _mtime, size in entries)
+        for path, _mtime, size in entries:
+            if total <= self.max_bytes * 3 // 4:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            total -= size
+        self._bytes = total
+
+
+@st.cache_resource(show_spinner=False)
+def _parse_store():
+    return ParseStore(
+        os.path.join(CACHE_DIR, "parsed"), PARSER_VERSION, PARSE_CACHE_MAX_BYTES
+    )
+
+
+# The three parse caches below take `_parse`, the function that turns a
+# data-window block into releases on a cache miss (extract_releases by
+# default). Being underscored it is not part of the cache key: the process
+# pool passes _not_cached to find the misses, then a lookup of the releases
+# the pool computed, so parallel parses read and fill the same caches.
+
+
+class _NotCached(Exception):
+    """Raised by _not_cached: this window's releases are not in the cache."""
+
+
+def _not_cached(block):
+    raise _NotCached(block)
+
+
+# Window and block parses live in memory only: they let a changed file
+# reuse the parse of its unchanged weeks. The file-level results are the
+# ones persisted, once, in the ParseStore.
+
+
+@st.cache_data(max_entries=8192, show_spinner=False)
+def _cached_block_releases(block_sha, parser_version, _block, _parse=extract_releases):
+    return _parse(_block)
+
+
+@st.cache_data(max_entries=8192, show_spinner=False)
+def _cached_parse_block(block_sha, parser_version, _block, _parse=extract_releases):
+    """(data-window block, releases) pairs for one marker block. A marker
+    block holding several weeks reuses the releases of the unchanged ones."""
+    return [
+        (w, _cached_block_releases(_block_sha(w), parser_version, w, _parse))
+        for w in split_block_by_data_window(_block)
+    ]
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def _cached_parse_file(filename, text_sha, parser_version, _text, _parse=extract_releases):
+    # Same result as extract_blocks(split_weekly=True) + extract_releases,
+    # but the Data-window split and the release parse are cached per marker
+    # block: when a file changes (usually its newest week), only the blocks
+    # whose text changed are parsed again.
+    key = ("file", filename, text_sha)
+    parsed = _parse_store().get(key)
+    if parsed is None:
+        blocks, unknown_stems, issues = _extract_marker_blocks(_text, filename)
+        pairs = [
+            pair
+            for b in blocks
+            for pair in _cached_parse_block(_block_sha(b), parser_version, b, _parse)
+        ]
+        parsed = (pairs, unknown_stems, issues)
+        _parse_store().put(key, parsed)
+    return parsed
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _cached_note_versions(filename, text_sha, parser_version, _text):
+    key = ("note_versions", filename, text_sha)
+    versions = _parse_store().get(key)
+    if versions is None:
+        versions = extract_macro_note_versions(_text, source_file=filename)
+        _parse_store().put(key, versions)
+    return versions
+
+
+def _parse_file(result, parse=extract_releases):
+    """((block, releases) pairs, unknown stems, marker issues) for a
+    LoadResult, from the parse cache."""
+    return _cached_parse_file(
+        result.filename, _text_sha(result.text), PARSER_VERSION, result.text, parse
+    )
+
+
+def _note_versions(result):
+    return _cached_note_versions(
+        result.filename, _text_sha(result.text), PARSER_VERSION, result.text
+    )
+
+
+class ArchiveFile:
+    """One loaded notes file with its parse, shared read-only by every
+    session. Nothing here is copied per caller: treat it as immutable."""
+
+    def __init__(self, result, parsed=None):
+        self.result = result
+        if parsed is None:
+            parsed = _parse_file(result) if result.text else ((), (), ())
+        pairs, unknown_stems, issues = parsed
+        self.parsed = tuple((b, tuple(rels)) for b, rels in pairs)
+        self.unknown_stems = tuple(unknown_stems)
+        self.marker_issues = tuple(issues)
+        self.releases = tuple(r for _b, rels in self.parsed for r in rels)
+        self._note_versions = None
+        self._by_country = None
+
+    def note_versions(self):
+        if self._note_versions is None:
+            self._note_versions = tuple(_note_versions(self.result)) if self.result.text else ()
+        return self._note_versions
+
+    def country_releases(self, country):
+        """Releases tagged with `country`, in file order. The per-country
+        index is built once, on first use, and shared like the parse."""
+        if self._by_country is None:
+            by_country = {}
+            for r in self.releases:
+                for c in dict.fromkeys(r.countries or ()):
+                    by_country.setdefault(c, []).append(r)
+            self._by_country = {c: tuple(rels) for c, rels in by_country.items()}
+        return self._by_country.get(country, ())
+
+
+class Archive:
+    """Process-wide store of ArchiveFiles, one per (filename, version).
+
+    The version is the upstream blob SHA when known, else a hash of the
+    loaded text. Storing a new version of a file drops the old one and the
+    views built from it, so memory follows the archive size, not the number
+    of sessions.
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._views = {}
+        # Upstream listing (filename -> blob SHA) in use; see _upstream_versions.
+        # Replaced as a whole, never mutated, so a reader's dict stays whole.
+        self.versions = {}
+        self.versions_checked_at = 0.0
+        # (filename, blob SHA) -> (ArchiveFile, retry at) for loads whose
+        # text did not hash to the listed SHA; see _archive_files.
+        self._mismatched = {}
+        # Background tasks running: (filename, blob SHA) loads, "listing".
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def get(self, filename, version):
+        return self._files.get((filename, version))
+
+    def latest(self, filename):
+        """The stored ArchiveFile for `filename`, whatever its version."""
+        for (name, _version), archive_file in list(self._files.items()):
+            if name == filename:
+                return archive_file
+        return None
+
+    def claim(self, key):
+        """True if the caller should run background task `key` (a file load
+        or the listing); False if it is already running."""
+        with self._lock:
+            if key in self._running:
+                return False
+            self._running.add(key)
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._running.discard(key)
+
+    def mismatched(self, filename, blob_sha):
+        """The last load of `filename` that did not match `blob_sha`, while
+        it is too early to fetch it again; else None."""
+        entry = self._mismatched.get((filename, blob_sha))
+        if entry is None or time.time() >= entry[1]:
+            return None
+        return entry[0]
+
+    def put_mismatched(self, filename, blob_sha, archive_file):
+        with self._lock:
+            for key in [k for k in self._mismatched if k[0] == filename]:
+                del self._mismatched[key]
+            self._mismatched[(filename, blob_sha)] = (
+                archive_file, time.time() + MISMATCH_RETRY_SECONDS
+            )
+        return archive_file
+
+    def view(self, key, archive_files, build):
+        """build(archive_files), kept under `key` until one of the files is
+        replaced by another version (or another set of files is asked for)."""
+        archive_files = tuple(archive_files)
+        cached = self._views.get(key)
+        if cached is not None and len(cached[0]) == len(archive_files) and all(
+            a is b for a, b in zip(cached[0], archive_files)
+        ):
+            return cached[1]
+        value = build(archive_files)
+        with self._lock:
+            # Only views over stored files: put() is what evicts them.
+            stored = {id(af) for af in self._files.values()}
+            if all(id(af) in stored for af in archive_files):
+                self._views[key] = (archive_files, value)
+        return value
+
+    def put(self, filename, version, archive_file):
+        with self._lock:
+            replaced = [self._files.pop(k) for k in list(self._files) if k[0] == filename]
+            self._files[(filename, version)] = archive_file
+            for key in [k for k in self._mismatched if k[0] == filename]:
+                del self._mismatched[key]
+            # Views built from a replaced file would keep it alive.
+            for key, (files, _value) in list(self._views.items()):
+                if any(af is old for af in files for old in replaced):
+                    del self._views[key]
+        return archive_file
+
+
+@st.cache_resource(show_spinner=False)
+def _archive():
+    return Archive()
 
 
 def _refresh_token():
     return st.session_state.get("refresh_token", 0)
 
 
-def _load_file(filename):
-    return _cached_load_file(filename, _refresh_token())
+# Opt-in process pool for cold parses: MACRO_PARSE_WORKERS=N (N >= 2).
+# Unset, 0 or 1 parses in-process as before.
+PARSE_WORKERS = int(os.environ.get("MACRO_PARSE_WORKERS") or 0)
+
+
+@st.cache_resource(show_spinner=False)
+def _parse_pool():
+    # spawn, not fork: the Streamlit server process is multi-threaded.
+    return ProcessPoolExecutor(
+        max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _parse_results_in_pool(results):
+    """_parse_file() for several LoadResults, with the cache misses spread
+    over the process pool.
+
+    Files already in the parse cache come straight from it. For the others,
+    marker tokenizing and the Data-window split stay here (one cheap pass
+    each), cached windows are reused, and only the missing windows go to
+    the pool. The file, block and window caches are then filled with the
+    pool's releases, so the output is exactly that of a sequential parse.
+    If the pool is broken (a worker died) or cannot run, it is dropped and
+    the misses are parsed in-process.
+    """
+    parsed = {}
+    todo = {}
+    for result in results:
+        try:
+            parsed[result.filename] = _parse_file(result, _not_cached)
+        except _NotCached:
+            todo[result.filename] = result
+
+    windows = {}
+    for result in todo.values():
+        blocks, _unknown, _issues = _extract_marker_blocks(result.text, result.filename)
+        for b in blocks:
+            for w in split_block_by_data_window(b):
+                sha = _block_sha(w)
+                if sha in windows:
+                    continue
+                try:
+                    _cached_block_releases(sha, PARSER_VERSION, w, _not_cached)
+                except _NotCached:
+                    windows[sha] = w
+
+    computed = dict(zip(windows, _extract_releases_in_pool(list(windows.values()))))
+
+    def lookup(w):
+        releases = computed.get(_block_sha(w))
+        return extract_releases(w) if releases is None else releases
+
+    for filename, result in todo.items():
+        parsed[filename] = _parse_file(result, lookup)
+    return [parsed[result.filename] for result in results]
+
+
+def _extract_releases_in_pool(windows):
+    """extract_releases over `windows` on the process pool, in order."""
+    if not windows:
+        return []
+    chunksize = max(1, len(windows) // (PARSE_WORKERS * 4))
+    try:
+        return list(_parse_pool().map(extract_releases, windows, chunksize=chunksize))
+    except (BrokenExecutor, OSError, pickle.PicklingError):
+        # A dead worker breaks the pool for good: drop the cached one so the
+        # next cold parse starts a fresh pool, and parse here this time.
+        _parse_pool.clear()
+        return [extract_releases(w) for w in windows]
+
+
+# Concurrent downloads when several files are missing from the Archive.
+LOAD_WORKERS = 8
+# How long a load that did not match its listed blob SHA is served before
+# the file is fetched again (raw.githubusercontent.com's CDN can lag a push).
+MISMATCH_RETRY_SECONDS = 60
+
+
+def _timed_load(filename, blob_sha):
+    """Load `filename` at upstream blob `blob_sha`: the fresh disk copy
+    when it already holds that blob, else a forced fetch from GitHub."""
+    t0 = time.perf_counter()
+    result = load_file(filename)
+    if result.source == "cache" and not _matches_blob(result, blob_sha):
+        result = load_file(filename, force_refresh=True)
+    return result, time.perf_counter() - t0
+
+
+def _load_files(files):
+    """[(LoadResult, seconds)] for the (filename, blob SHA) pairs in
+    `files`, in order, fetched on a bounded thread pool. A failed fetch is
+    not an exception: load_file falls back to the stale disk copy by itself
+    (result.error is then set)."""
+    if len(files) <= 1:
+        return [_timed_load(*f) for f in files]
+    with ThreadPoolExecutor(max_workers=min(LOAD_WORKERS, len(files))) as pool:
+        return list(pool.map(lambda f: _timed_load(*f), files))
+
+
+def _matches_blob(result, blob_sha):
+    """True if `result` holds exactly the upstream blob `blob_sha`."""
+    if result.error or result.text is None:
+        return False
+    return git_blob_sha(result.text.encode("utf-8")) == blob_sha
+
 
+def _keep(archive, filename, version, blob_sha, archive_file):
+    """Store a freshly loaded ArchiveFile: under its version when the text
+    is that blob (or unversioned), else as a mismatched load."""
+    if not blob_sha or _matches_blob(archive_file.result, blob_sha):
+        return archive.put(filename, version, archive_file)
+    return archive.put_mismatched(filename, blob_sha, archive_file)
+
+
+def _load_in_background(filename, blob_sha):
+    """Load and parse `filename` at `blob_sha` on a daemon thread, once per
+    process however many sessions ask; the next rerun finds it stored."""
+    archive = _archive()
+    key = (filename, blob_sha)
+    if not archive.claim(key):
+        return
+
+    def run():
+        try:
+            result, _seconds = _timed_load(filename, blob_sha)
+            _keep(archive, filename, blob_sha, blob_sha, ArchiveFile(result))
+        except Exception:
+            pass  # the next rerun tries again
+        finally:
+            archive.release(key)
+
+    threading.Thread(target=run, name=f"archive-load-{filename}", daemon=True).start()
+
+
+def _archive_file(filename, stale=None):
+    return _archive_files([filename], stale=stale)[0]
+
+
+def _archive_files(filenames, timings=None, stale=None):
+    """Shared ArchiveFiles for `filenames`, in order: an O(1) lookup each
+    once loaded.
+
+    With upstream versions known, a file is loaded (_timed_load: the disk
+    copy if it holds the listed blob, else from GitHub) and parsed once per
+    blob SHA for the whole process. A load whose text does not hash to that
+    SHA (failed, or raw.githubusercontent.com's CDN still serving the body
+    from before the push) is not stored under it, so old text is never
+    pinned under the new SHA; it is served to every session for
+    MISMATCH_RETRY_SECONDS before the file is fetched again. Without
+    versions, loads go through _cached_load_file as before and the parse is
+    shared per content hash.
+
+    Stale-while-revalidate: when the listed SHA of a file is new but an
+    older version is stored, that older ArchiveFile is returned at once and
+    the new one is loaded on a background thread (_load_in_background). Such
+    files are added to `stale` (a list) when given, for the caller to label.
+
+    Versioned files missing from the archive are downloaded together on a
+    bounded thread pool (_load_files), so a country's allow-list loads in
+    about the time of its slowest file; their load times go to `timings`
+    (filename -> seconds) when given. With PARSE_WORKERS set, the files are
+    then parsed together on the process pool. Order is kept, so
+    frozen-before-live still decides which duplicate dedup_releases /
+    _catalogue_dedup keep.
+    """
+    archive = _archive()
+    versions = _upstream_versions()
+    found = {}
+    missing = []
+    for filename in dict.fromkeys(f for f in filenames if f):
+        blob_sha = versions.get(filename)
+        if blob_sha:
+            version, result = blob_sha, None
+        else:
+            result = _cached_load_file(filename, _refresh_token())
+            version = "text:" + _text_sha(result.text or "")
+        archive_file = archive.get(filename, version)
+        if archive_file is None and blob_sha:
+            previous = archive.latest(filename)
+            if previous is not None:
+                if archive.mismatched(filename, blob_sha) is None:
+                    _load_in_background(filename, blob_sha)
+                if stale is not None:
+                    stale.append(filename)
+                archive_file = previous
+            else:
+                archive_file = archive.mismatched(filename, blob_sha)
+        if archive_file is not None:
+            found[filename] = archive_file
+            continue
+        missing.append((filename, version, blob_sha, result))
+
+    to_load = [(filename, sha) for filename, _v, sha, result in missing if result is None]
+    loaded = dict(zip((filename for filename, _sha in to_load), _load_files(to_load)))
+    if timings is not None:
+        timings.update((filename, seconds) for filename, (_r, seconds) in loaded.items())
+    missing = [
+        (filename, version, blob_sha, result or loaded[filename][0])
+        for filename, version, blob_sha, result in missing
+    ]
 
-def _load_many(filenames):
-    return _cached_load_many(tuple(filenames), _refresh_token())
+    to_parse = [result for _f, _v, _sha, result in missing if result.text]
+    if PARSE_WORKERS > 1 and len(to_parse) > 0:
+        parsed = iter(_parse_results_in_pool(to_parse))
+    else:
+        parsed = iter(())
+    for filename, version, blob_sha, result in missing:
+        archive_file = ArchiveFile(result, next(parsed, None) if result.text else None)
+        found[filename] = _keep(archive, filename, version, blob_sha, archive_file)
+    return [found[f] for f in filenames if f]
+
+
+def _render_stale_notice(stale):
+    """Caption for files _archive_files served from their previous version."""
+    if stale:
+        st.caption(
+            "Stale: " + ", ".join(f"`{f}`" for f in stale)
+            + " changed upstream; showing the previous version while the new "
+            "one loads (it appears on the next rerun)."
+        )
 
 
 def _scope_label(scope):
@@ -161,9 +850,17 @@ def sidebar():
 
     st.sidebar.divider()
     if st.sidebar.button("Refresh from GitHub", use_container_width=True, key="sb_refresh"):
+        st.session_state["refresh_changed"] = _refresh_changed_files()
         st.session_state["refresh_token"] = _refresh_token() + 1
-        st.cache_data.clear()
         st.rerun()
+    if "refresh_changed" in st.session_state:
+        changed = st.session_state["refresh_changed"]
+        if changed is None:
+            st.sidebar.caption("Upstream versions unavailable: all files reloaded.")
+        elif changed:
+            st.sidebar.caption("Changed upstream: " + ", ".join(f"`{f}`" for f in changed))
+        else:
+            st.sidebar.caption("Up to date: no file changed upstream.")
     st.sidebar.caption(f"Cache token: {_refresh_token()}")
 
     return {
@@ -189,16 +886,19 @@ def tab_weekly_monitor(state):
         st.warning(f"No `{_view_display(view)}` file configured for `{scope}`.")
         return
 
-    result = _load_file(scope_file)
+    stale = []
+    archive_file = _archive_file(scope_file, stale)
+    result = archive_file.result
     if result.error:
         st.warning(result.error)
+    _render_stale_notice(stale)
     if not result.text:
         st.info(f"No content available for `{scope_file}`.")
         return
 
-    blocks = extract_blocks(result.text, source_file=result.filename)
-    scope_blocks = [b for b in blocks if b.region == scope] or blocks
-    if not scope_blocks:
+    parsed = archive_file.parsed
+    scope_parsed = [(b, rels) for b, rels in parsed if b.region == scope] or parsed
+    if not scope_parsed:
         st.info(f"No `{scope}` blocks parsed from `{scope_file}`.")
         return
 
@@ -206,13 +906,21 @@ def tab_weekly_monitor(state):
     st.caption(
         f"File: `{scope_file}`  |  Region: `{scope}`  |  {source_badge(result)}"
     )
+    if archive_file.unknown_stems:
+        st.caption(
+            "Skipped blocks with unknown markers (not in BLOCK_STEMS): "
+            + ", ".join(f"`{stem}`" for stem in archive_file.unknown_stems)
+        )
+    for stem in dict.fromkeys(stem for _kind, stem, _offset in archive_file.marker_issues):
+        st.caption(describe_issues(result.text, archive_file.marker_issues, stem))
 
     # Build (label, block, start, end) entries so the Week selector can rank
     # by date even when only an inferred range is available.
     entries = []
-    for b in scope_blocks:
+    for b, rels in scope_parsed:
         label, start, end = block_data_window(b)
-        entries.append({"label": label, "block": b, "start": start, "end": end})
+        entries.append({"label": label, "block": b, "releases": rels,
+                        "start": start, "end": end})
 
     # Sort weekly entries with most recent first. Blocks without any date
     # information sink to the bottom in stable order.
@@ -258,7 +966,7 @@ def tab_weekly_monitor(state):
         else:
             st.markdown(f"### {b.stem} (no data window declared)")
 
-        releases = extract_releases(b)
+        releases = entry["releases"]
         # Dedup by stable key (country|normalized|date|importance) so the
         # same Reuters event parsed twice in the same archive doesn't
         # surface twice.
@@ -296,8 +1004,7 @@ def tab_weekly_monitor(state):
         # order on ties (which mirrors how the source file is laid out).
         def _sort_key(idx_r):
             idx, r = idx_r
-            d = parse_release_date(r.date_str) or _dt.date.min
-            return (d, idx)
+            return (_release_ordinal(r), idx)
 
         indexed = list(enumerate(data_releases))
         indexed.sort(key=_sort_key, reverse=sort_desc)
@@ -325,14 +1032,17 @@ def tab_macro_synthesis(state):
         st.info(f"No `Frozen week` file configured for `{scope}`.")
         return
 
-    result = _load_file(scope_file)
+    stale = []
+    archive_file = _archive_file(scope_file, stale)
+    result = archive_file.result
     if result.error:
         st.warning(result.error)
+    _render_stale_notice(stale)
     if not result.text:
         st.info(f"No content available for `{scope_file}`.")
         return
 
-    blocks = extract_blocks(result.text, source_file=result.filename)
+    blocks = [b for b, _rels in archive_file.parsed]
     scope_blocks = [b for b in blocks if b.region == scope] or blocks
     if not scope_blocks:
         st.info(f"No `{scope}` weekly blocks parsed from `{scope_file}`.")
@@ -492,14 +1202,17 @@ def tab_macro_notes(state):
     )
 
     scope, filename = note_options[idx]
-    result = _load_file(filename)
+    stale = []
+    archive_file = _archive_file(filename, stale)
+    result = archive_file.result
     if result.error:
         st.warning(result.error)
+    _render_stale_notice(stale)
     if not result.text:
         st.info(f"No content available for `{filename}`.")
         return
 
-    blocks = extract_macro_note_versions(result.text, source_file=result.filename)
+    blocks = list(archive_file.note_versions())
     versions = _macro_note_versions(blocks)
     if not versions:
         st.info(f"No note versions parsed from `{filename}`.")
@@ -554,6 +1267,25 @@ _CONFIDENCE_ICON = {"High": "H", "Medium": "M", "Low": "L"}
 _CATALOGUE_THEMES = ["Inflation", "Labor", "Growth", "Policy", "External", "Housing"]
 
 
+@functools.lru_cache(maxsize=65536)
+def _date_ordinal(date_str):
+    """parse_release_date(date_str) as a day ordinal, 0 when unparseable.
+    Parsed once per distinct string for the whole process."""
+    d = parse_release_date(date_str)
+    return d.toordinal() if d else 0
+
+
+def _release_ordinal(r):
+    return _date_ordinal(r.date_str)
+
+
+@functools.lru_cache(maxsize=16384)
+def _release_name(title):
+    """normalize_release_name(title) -> (name, theme, confidence), memoized:
+    the catalogue sees the same few hundred titles on every rerun."""
+    return tuple(normalize_release_name(title))
+
+
 def _release_sort_key(r):
     d = parse_release_date(r.date_str) or parse_release_date(r.raw_block)
     return d or _dt.date.min
@@ -569,8 +1301,7 @@ def _catalogue_sort_key(r):
     a frozen vs live read of the same Mar CPI).
     """
     period = getattr(r, "reference_period", None) or ""
-    pub = parse_release_date(r.date_str) or _dt.date.min
-    return (period, pub)
+    return (period, _release_ordinal(r))
 
 
 _EXPORT_SEPARATOR = "-" * 50
@@ -649,6 +1380,90 @@ def _catalogue_dedup(releases):
     return out
 
 
+def _catalogue_row(name, entries):
+    """Table row, occurrences (latest reference period first) and
+    (theme, confidence) for one release name, from its (release, theme,
+    confidence) entries in dedup order."""
+    rels = [r for r, _theme, _conf in entries]
+    # Sort by reference period (what the release describes), with the
+    # publication date as a tiebreak. The row's "latest" is therefore
+    # the freshest reference period available, not whichever block was
+    # published last.
+    rels_sorted = tuple(sorted(rels, key=_catalogue_sort_key, reverse=True))
+    latest = rels_sorted[0]
+    regions = sorted({(r.region or "-") for r in rels})
+    files = sorted({r.source_file for r in rels})
+    _r, theme, conf = entries[0]
+    row = {
+        "Release": name,
+        "Theme": theme or "-",
+        "Conf": _CONFIDENCE_ICON.get(conf, conf),
+        "Occurrences": len(rels),
+        "Latest period": latest.reference_period or "-",
+        "Latest date": latest.date_str or "-",
+        "Imp": latest.importance or "-",
+        "Regions": ", ".join(regions),
+        "Files": ", ".join(files),
+    }
+    return row, rels_sorted, (theme, conf)
+
+
+class CountryCatalogue:
+    """The catalogue of one country over a set of source files: deduped,
+    normalized, grouped and sorted once per version of those files (see
+    Archive.view). Theme and confidence filters are applied per rerun by
+    select()."""
+
+    def __init__(self, country, archive_files):
+        country_releases = [r for af in archive_files for r in af.country_releases(country)]
+        self.has_country_releases = bool(country_releases)
+
+        # Catalogue dedup uses (country, normalized_name, reference_period) so
+        # two parses of the same Mar CPI (frozen + live, possibly with different
+        # importance flags) collapse into one occurrence. Frozen wins because
+        # frozen files come first in `allowed_files` and _catalogue_dedup keeps
+        # the FIRST occurrence. Releases with no reference_period are kept
+        # un-collapsed (we never merge unrelated releases just because the
+        # period couldn't be inferred from the title).
+        self._entries = {}
+        for r in _catalogue_dedup(country_releases):
+            name, theme, conf = _release_name(r.title)
+            if name:
+                self._entries.setdefault(name, []).append((r, theme, conf))
+
+        # Names whose releases all share one (theme, confidence) pass or fail
+        # a filter as a whole, so their row is built here once.
+        self._full = {}
+        for name, entries in self._entries.items():
+            if len({(theme, conf) for _r, theme, conf in entries}) == 1:
+                self._full[name] = _catalogue_row(name, entries)
+
+    def select(self, only_known, themes):
+        """rows (table order) and name -> (occurrences, (theme, confidence))
+        for the releases passing the filters."""
+        def keep(theme, conf):
+            if only_known and conf == "Low":
+                return False
+            return not (themes and theme not in themes)
+
+        rows, groups = [], {}
+        for name, entries in self._entries.items():
+            full = self._full.get(name)
+            if full is not None:
+                if not keep(*full[2]):
+                    continue
+                row, rels, meta = full
+            else:
+                kept = [e for e in entries if keep(e[1], e[2])]
+                if not kept:
+                    continue
+                row, rels, meta = _catalogue_row(name, kept)
+            rows.append(row)
+            groups[name] = (rels, meta)
+        rows.sort(key=lambda x: (-x["Occurrences"], x["Release"].lower()))
+        return rows, groups
+
+
 def tab_country_release_catalogue():
     """Per-country index of recurring releases. Click a row to see latest +
     previous occurrences, with optional latest-vs-previous compare."""
@@ -718,72 +1533,36 @@ def tab_country_release_catalogue():
 
     # Load only the files in the allow-list. Restrict releases to (a) the
     # selected country AND (b) source_file in the allow-list.
-    all_results = _load_many(allowed_files)
+    load_times = {}
+    stale = []
+    archive_files = _archive_files(allowed_files, load_times, stale)
+    all_results = [af.result for af in archive_files]
     render_load_status(all_results)
-    all_releases = releases_from_load_results(all_results)
-    if not all_releases:
+    _render_stale_notice(stale)
+    if load_times:
+        slowest = max(load_times, key=load_times.get)
+        st.caption(
+            f"Downloaded {len(load_times)} file(s); slowest `{slowest}` "
+            f"{load_times[slowest]:.2f} s"
+        )
+    if not any(af.releases for af in archive_files):
         st.info(f"No releases parsed from {', '.join(allowed_files)}.")
         return
 
-    country_releases = [
-        r for r in all_releases
-        if country in (r.countries or []) and r.source_file in allowed_files
-    ]
-    if not country_releases:
+    catalogue = _archive().view(
+        ("catalogue", country, tuple(allowed_files)),
+        archive_files,
+        lambda afs: CountryCatalogue(country, afs),
+    )
+    if not catalogue.has_country_releases:
         st.info(f"No releases tagged with {country} in the allowed source files.")
         return
 
-    # Catalogue dedup uses (country, normalized_name, reference_period) so
-    # two parses of the same Mar CPI (frozen + live, possibly with different
-    # importance flags) collapse into one occurrence. Frozen wins because
-    # frozen files come first in `allowed_files` and _catalogue_dedup keeps
-    # the FIRST occurrence. Releases with no reference_period are kept
-    # un-collapsed (we never merge unrelated releases just because the
-    # period couldn't be inferred from the title).
-    country_releases = _catalogue_dedup(country_releases)
-
-    groups = {}
-    meta = {}
-    for r in country_releases:
-        name, theme, conf = normalize_release_name(r.title)
-        if not name:
-            continue
-        if only_known and conf == "Low":
-            continue
-        if theme_filter and theme not in theme_filter:
-            continue
-        groups.setdefault(name, []).append(r)
-        if name not in meta:
-            meta[name] = (theme, conf)
-
+    rows, groups = catalogue.select(only_known, theme_filter)
     if not groups:
         st.info("No recurring releases match these filters.")
         return
 
-    rows = []
-    for name, rels in groups.items():
-        # Sort by reference period (what the release describes), with the
-        # publication date as a tiebreak. The row's "latest" is therefore
-        # the freshest reference period available, not whichever block was
-        # published last.
-        rels_sorted = sorted(rels, key=_catalogue_sort_key, reverse=True)
-        latest = rels_sorted[0]
-        regions = sorted({(r.region or "-") for r in rels})
-        files = sorted({r.source_file for r in rels})
-        theme, conf = meta[name]
-        rows.append({
-            "Release": name,
-            "Theme": theme or "-",
-            "Conf": _CONFIDENCE_ICON.get(conf, conf),
-            "Occurrences": len(rels),
-            "Latest period": latest.reference_period or "-",
-            "Latest date": latest.date_str or "-",
-            "Imp": latest.importance or "-",
-            "Regions": ", ".join(regions),
-            "Files": ", ".join(files),
-        })
-    rows.sort(key=lambda x: (-x["Occurrences"], x["Release"].lower()))
-
     df = pd.DataFrame(rows)
     st.caption(f"{len(rows)} recurring release(s) for {country}.")
     selection = st.dataframe(
@@ -808,10 +1587,9 @@ def tab_country_release_catalogue():
     selected_name = rows[selected_idx[0]]["Release"]
     # Same chronology rule as the table: latest reference period first, with
     # publication date as the tiebreak.
-    rels = sorted(groups[selected_name], key=_catalogue_sort_key, reverse=True)
+    rels, (theme, conf) = groups[selected_name]
 
     st.divider()
-    theme, conf = meta[selected_name]
     st.subheader(f"{country}  -  {selected_name}")
     st.caption(
         f"Theme: `{theme or '-'}`  |  Confidence: `{conf}`  |  "